@@ -3,12 +3,11 @@
 This module implements the intelligence of the main character in the mission. 
 """
 
-import random
 import pickle
+import functools
 import numpy as np
-from random import choice
 from time import time, sleep
-from collections import defaultdict
+from numba import njit
 from environment import Level, Environment
 import matplotlib.pyplot as plt
 
@@ -23,6 +22,15 @@ EXIT_REWARD = 5
 FIRE_REWARD = -100
 EMPTY_REWARD = -1
 
+# Window functions supported by smooth()
+_WINDOWS = {
+    'flat': lambda n: np.ones(n, 'd'), # Moving average
+    'hanning': np.hanning,
+    'hamming': np.hamming,
+    'bartlett': np.bartlett,
+    'blackman': np.blackman,
+}
+
 # Helper function
 def smooth(data, window_len=10, window='hanning'):
     """Smooth the data using a window with requested size.
@@ -59,19 +67,88 @@ def smooth(data, window_len=10, window='hanning'):
         raise ValueError("Input vector needs to be bigger than window size.")
     if window_len < 3:
         return data
-    if not window in ['flat', 'hanning', 'hamming', 'bartlett', 'blackman']:
+    if not window in _WINDOWS:
         raise ValueError("Window is on of 'flat', 'hanning', 'hamming', 'bartlett', 'blackman'")
-    s = np.r_[data[window_len-1:0:-1], data, data[-2:-window_len-1:-1]]
-
-    # Moving average
-    if window == 'flat': 
-        w = np.ones(window_len,'d')
-    else:
-        w = eval('np.'+ window +'(window_len)')
+    s = np.concatenate((data[window_len-1:0:-1], data, data[-2:-window_len-1:-1]))
+    w = _WINDOWS[window](window_len)
 
     y = np.convolve(w/w.sum(), s, mode='valid')
     return y
 
+@functools.lru_cache(maxsize=None)
+def make_kernel(n_actions, alpha, gamma):
+    """Make a Q-learning update kernel for the given parameters.
+
+    n_actions, alpha and gamma are compile-time constants of the returned
+    kernel. They are the same for both levels, so one kernel serves the whole
+    mission; the grid size only enters through the array shapes.
+
+    Args:
+        n_actions: Number of actions.
+        alpha, gamma: Q-Learning parameters.
+
+    Returns:
+        A compiled function update(q_table, action_mask, traj_s, traj_a, traj_r, traj_done, n)
+        applying the Q-learning updates of a recorded episode trajectory in place, where
+            q_table: Q table array of shape (grid_size, grid_size, n_actions).
+            action_mask: 1 for each action possible in a state, same shape as q_table.
+            traj_s: States visited, traj_s[t + 1] is the state reached from traj_s[t].
+            traj_a, traj_r, traj_done: Action index, reward and terminal flag of each transition.
+            n: Number of recorded transitions.
+        Transitions are replayed from the last to the first so that rewards
+        propagate back along the path within a single sweep.
+    """
+    alpha = np.float32(alpha)
+    gamma = np.float32(gamma)
+
+    # Only scalars are captured, so the on-disk cache is reused across runs
+    @njit(cache=True)
+    def update(q_table, action_mask, traj_s, traj_a, traj_r, traj_done, n):
+        for t in range(n - 1, -1, -1):
+            cx, cy, ai = traj_s[t, 0], traj_s[t, 1], traj_a[t]
+            if traj_done[t]:
+                target = traj_r[t]
+            else:
+                # maximum over the possible actions of the next state
+                nx, ny = traj_s[t + 1, 0], traj_s[t + 1, 1]
+                max_q = np.float32(-np.inf)
+                for a in range(n_actions):
+                    if action_mask[nx, ny, a] and q_table[nx, ny, a] > max_q:
+                        max_q = q_table[nx, ny, a]
+                target = traj_r[t] + gamma * max_q
+            q_table[cx, cy, ai] = (1 - alpha) * q_table[cx, cy, ai] + alpha * target
+
+    return update
+
+@njit(cache=True)
+def pick_action(q_row, mask_row, eps, rand_u, rand_v):
+    """Epsilon-greedy action selection among the possible actions.
+
+    Args:
+        q_row: Q values of the current state.
+        mask_row: 1 for each action possible in the current state, 0 otherwise.
+        eps: Exploration rate.
+        rand_u: Uniform random number in [0, 1] deciding between exploration and exploitation.
+        rand_v: Uniform random number in [0, 1) picking the action when exploring.
+
+    Returns:
+        Index of the selected action.
+    """
+    n_actions = q_row.shape[0]
+    if rand_u > eps:
+        best = -1
+        for a in range(n_actions):
+            if mask_row[a] and (best < 0 or q_row[a] > q_row[best]):
+                best = a
+        return best
+    k = int(rand_v * mask_row.sum())
+    for a in range(n_actions):
+        if mask_row[a]:
+            if k == 0:
+                return a
+            k -= 1
+    return -1
+
 class Agent:
     """Q-Learning agent.
     
@@ -85,8 +162,12 @@ class Agent:
             Q Table for Q-Learning.
         env: 
             Mission environment class instance.
+        verbose:
+            If true, print per-step learning details.
+        headless:
+            If true, learn without delaying and displaying each move.
     """      
-    def __init__(self, level, max_episode):
+    def __init__(self, level, max_episode, verbose=False, headless=False):
         """Initialise Q-Learning params."""
         if level == "easy":
             _level = Level.EASY
@@ -98,8 +179,11 @@ class Agent:
         self.env = Environment(_level)
         self.init_params()
         self.init_q_tables()
-        self.init_plot_config()
+        self.init_trajectory()
         self.max_episode = int(max_episode)
+        self.init_plot_config()
+        self.verbose = verbose
+        self.headless = headless
         # QUIT: Quit the mission without showing figures. 
         # DONE_LEARNING: Done learning, showing figures and Q table.
         self.QUIT, self.DONE_LEARNING = 1, 2
@@ -110,8 +194,9 @@ class Agent:
 
         This method is required to be filled in.
         """
-        self.alpha = ALPHA
-        self.gamma = GAMMA
+        # float32 to match the Q table, so the compiled updates stay in single precision
+        self.alpha = np.float32(ALPHA)
+        self.gamma = np.float32(GAMMA)
         self.decay_rate = DECAY_RATE
         self.epsilon = EPSILON
 
@@ -121,35 +206,54 @@ class Agent:
         Note:
             For the purpose of displaying Q table, 
             it is required the Q table to be a nested dictionary with the format: {state: {action: q_value}}.
+            The Q table is stored as an array, get_q_table() converts it to that format.
         """
-        # Init states with the format (x, y).
-        # Example: (0, 1), (0, 1)
-        # Note: States must be a list of tuple.
-        self.states = []
+        # States are the (x, y) cells of the grid, used directly as Q table indices.
         self.grid_size = self.env.get_grid_size()
-        for x in range(self.grid_size):
-            for y in range(self.grid_size):
-                self.states.append((x, y))
-
-        # Init Q Table with the format: {state: {action: q_value}}
-        # Example: {(0, 0): {"left": 0.123, ..., "up": 0.456}}
-        self.q_table = defaultdict(dict) # For current Q-values
-        self.q_diff_table = defaultdict(dict) # For difference between new and old Q-tables. You will need it to check if the Q_values converge.
-        self.prev_q_table = defaultdict(dict) # For previous Q-values
-        self.actions = self.env.get_actions() # Obtaining robot's actions: up, down, right and left
 
-        for state in self.states:
-            for action in self.actions.keys():
-                self.q_table[state][action] = 0
-                self.q_diff_table[state][action] = 0
-                self.prev_q_table[state][action] = 0 
+        self.actions = self.env.get_actions() # Obtaining robot's actions: up, down, right and left
+        self.action_list = list(self.actions.keys())
+        self.action_idx = {action: i for i, action in enumerate(self.action_list)}
+        self.n_actions = len(self.action_list)
+
+        # Init Q Table as an array indexed by (x, y, action_idx).
+        # Example: self.q_table[0, 0, self.action_idx["left"]] = 0.123
+        # Use get_q_table() for the nested dictionary format.
+        shape = (self.grid_size, self.grid_size, self.n_actions)
+        self.q_table = np.zeros(shape, dtype=np.float32) # For current Q-values
+        self.q_diff_table = np.zeros(shape, dtype=np.float32) # For difference between new and old Q-tables. You will need it to check if the Q_values converge.
+        self.prev_q_table = np.zeros(shape, dtype=np.float32) # For previous Q-values
+
+        # Possible actions do not change during the mission, 1 marks an action possible in a state.
+        self.action_mask = np.zeros(shape, dtype=np.int8)
+        for state in np.ndindex(self.grid_size, self.grid_size):
+            for action in self.env.get_possible_actions(state):
+                self.action_mask[state][self.action_idx[action]] = 1
+
+        # Q-learning update kernel compiled for these parameters
+        self.update_kernel = make_kernel(self.n_actions, float(self.alpha), float(self.gamma))
+        self._q_table_dict = None # Nested dictionary view of q_table, rebuilt after it changes
+
+    def init_trajectory(self):
+        """Initialise buffers recording the trajectory of an episode.
+
+        The buffers are reused by every episode, which is capped at max_steps moves.
+        traj_s also keeps the path taken in the episode.
+        """
+        self.max_steps = self.grid_size * self.grid_size * 4
+        self.traj_s = np.empty((self.max_steps + 1, 2), dtype=np.int16)
+        self.traj_a = np.empty(self.max_steps, dtype=np.int32)
+        self.traj_r = np.empty(self.max_steps, dtype=np.float32)
+        self.traj_done = np.empty(self.max_steps, dtype=np.bool_)
 
     def init_plot_config(self):
         """Initialise variables for plotting figures.
         
         This method is required to be filled in.
         """
-        self.accumulated_reward_for_episode = list()
+        # Accumulated reward of each episode, filled up to _reward_idx
+        self._rewards = np.empty(self.max_episode, dtype=np.float32)
+        self._reward_idx = 0
 
        
     def plot(self):
@@ -157,115 +261,154 @@ class Agent:
 
         This method is required to be filled in.
         """        
-        plt.figure()
-        plt.plot(self.accumulated_reward_for_episode)
-        plt.title('Plot of accumulated reward vs episode')
-        plt.xlabel('Episode')
-        plt.ylabel('Accumulated reward')
-        plt.show()
-        plt.figure()
-        plt.plot(self.accumulated_reward_for_episode)
-        plt.title('Plot of smoothened accumulated reward vs episode')
-        plt.xlabel('Episode')
-        plt.ylabel('Smoothened accumulated reward')
+        rewards = self._rewards[:self._reward_idx]
+        window_len = max(3, len(rewards)//20 | 1)
+        if rewards.size >= window_len:
+            # smooth() pads both ends, trim the output back to one value per episode
+            smoothed = smooth(rewards, window_len)[window_len//2:window_len//2 + rewards.size]
+        else:
+            smoothed = rewards
+
+        fig, (reward_ax, smoothed_ax) = plt.subplots(2, 1, sharex=True)
+        reward_ax.plot(rewards)
+        reward_ax.set_title('Plot of accumulated reward vs episode')
+        reward_ax.set_ylabel('Accumulated reward')
+        smoothed_ax.plot(smoothed)
+        smoothed_ax.set_title('Plot of smoothened accumulated reward vs episode')
+        smoothed_ax.set_xlabel('Episode')
+        smoothed_ax.set_ylabel('Smoothened accumulated reward')
+        fig.tight_layout()
         plt.show()
 
-    def get_action(self, position):
+    def get_action(self, x, y):
         """Get action depending on exploration or exploitation.
 
         This method is required to be filled in.
 
         Args:
-            position: A tuple of position to get action.
+            x, y: Position to get action.
 
         Returns:
             A string of action. Either be "left", "right", "up" or "down".
         """
-        possible_action = self.env.get_possible_actions(position)
-
-        self.decay_epsilon_greedy()
-
-        if random.uniform(1,0) > self.epsilon:
-            # exploit
-            print("exploit")
-            action = max(self.q_table[position], key=self.q_table[position].get)
-        else:
-            # explore
-            print("explore")
-            better_possible_action = [k for k, v in self.q_table[position].items() if v == 0]
-            if better_possible_action:
-                action = choice(better_possible_action)
-            else:
-                action = choice(possible_action)
-            
-        return action
+        rand_u = np.random.random()
+        if self.verbose:
+            print("exploit" if rand_u > self.epsilon else "explore")
+        action_idx = pick_action(self.q_table[x, y], self.action_mask[x, y], self.epsilon, rand_u, np.random.random())
+        return self.action_list[action_idx]
 
 
-    def get_reward(self, position):
+    def get_reward(self, x, y):
         """Get reward for the selected action.
 
         This method is required to be filled in.
 
         Args:
-            position: A tuple of position to get action.
+            x, y: Position to get reward.
 
         Returns:
             A value of reward at the specified position.
         """
-        self.girl_map, self.boy_map = self.env.get_people_map()
-        self.exit_map = self.env.get_exit_position()
-        self.fire_map = self.env.get_fire_map()
-
-        print(f"current position {position}")
-
-        if position in self.boy_map: # reward for moving to victim on fire
-            reward = BOY_REWARD
-            self.boy_map = []
-            print("             YOU ARE AT BOY")
-        elif position in self.girl_map: # reward for moving to victim not on fire
-            reward = GIRL_REWARD
-            self.girl_map = []
-            print("             YOU ARE AT GIRL")
-        elif position in self.exit_map: # reward for moving to exit
-            reward = EXIT_REWARD
-            print("             YOU ARE AT EXIT")
-        elif position in self.fire_map: # reward for moving to fire
-            reward = FIRE_REWARD
-            print("             YOU ARE AT FIRE")
-        else: 
-            reward = EMPTY_REWARD
-            print("             YOU ARE AT EMPTY")
+        position = (x, y)
+        reward = int(self.reward_grid[position])
+        rescued = self.victim_grid[position] != 0
+        if rescued:
+            # victims are rescued only once
+            self.victim_grid[position] = 0
+            self.reward_grid[position] = EMPTY_REWARD
+
+        if self.verbose:
+            print(f"current position {position}")
+            if rescued and position in self.boy_map:
+                print("             YOU ARE AT BOY")
+            elif rescued:
+                print("             YOU ARE AT GIRL")
+            elif position in self.exit_map:
+                print("             YOU ARE AT EXIT")
+            elif position in self.fire_map:
+                print("             YOU ARE AT FIRE")
+            else:
+                print("             YOU ARE AT EMPTY")
 
-        
         return reward
+
+    def _load_maps(self):
+        """Load the environment maps for the current episode.
+
+        The maps are static within an episode, so they are fetched once after
+        the environment is reset and stored as frozensets of positions.
+        """
+        girl_map, boy_map = self.env.get_people_map()
+        self.girl_map = frozenset(tuple(p) for p in girl_map)
+        self.boy_map = frozenset(tuple(p) for p in boy_map)
+        self.exit_map = frozenset(tuple(p) for p in self.env.get_exit_position())
+        self.fire_map = frozenset(tuple(p) for p in self.env.get_fire_map())
+
+    def _build_reward_grid(self):
+        """Build reward and terminal grids for the current episode.
+
+        reward_grid holds the reward of moving to each cell, terminal_grid
+        is non-zero on cells that end the episode (exit and fire) and
+        victim_grid is non-zero on cells with a victim not rescued yet.
+        """
+        self.reward_grid = np.full((self.grid_size, self.grid_size), EMPTY_REWARD, dtype=np.int8)
+        self.terminal_grid = np.zeros((self.grid_size, self.grid_size), dtype=np.uint8)
+        self.victim_grid = np.zeros((self.grid_size, self.grid_size), dtype=np.uint8)
+        # Filled from lowest to highest priority: fire, exit, girl, boy
+        for position in self.fire_map:
+            self.reward_grid[position] = FIRE_REWARD
+            self.terminal_grid[position] = 1
+        for position in self.exit_map:
+            self.reward_grid[position] = EXIT_REWARD
+            self.terminal_grid[position] = 1
+        for position in self.girl_map:
+            self.reward_grid[position] = GIRL_REWARD
+            self.victim_grid[position] = 1
+        for position in self.boy_map:
+            self.reward_grid[position] = BOY_REWARD
+            self.victim_grid[position] = 1
   
+    @property
+    def q_table_dict(self):
+        """Q table as a nested dictionary with the format: {state: {action: q_value}}.
+
+        The conversion is memoized until the Q table is updated at the end of an episode.
+        """
+        if self._q_table_dict is None:
+            self._q_table_dict = {state: dict(zip(self.action_list, self.q_table[state].tolist()))
+                                  for state in np.ndindex(self.grid_size, self.grid_size)}
+        return self._q_table_dict
+
     def get_q_table(self):
-        """Get Q table."""
-        return self.q_table
+        """Get Q table.
+
+        Returns:
+            A nested dictionary with the format: {state: {action: q_value}}.
+        """
+        return self.q_table_dict
 
     def decay_epsilon_greedy(self):
         """Decay epsilon greedy implementation.
 
         This method is required to be filled in.
         """
-        print(f"epsilon before: {self.epsilon}")
-        self.epsilon = (1-self.decay_rate)*self.epsilon
-        print(f"epsilon after: {self.epsilon}")
-
+        if self.verbose:
+            print(f"epsilon before: {self.epsilon}")
         # implement lower bound to ensure exploration never totally disappear
-        if self.epsilon < 0.1:
-            self.epsilon = 0.1
+        self.epsilon = max(0.1, (1-self.decay_rate)*self.epsilon)
+        if self.verbose:
+            print(f"epsilon after: {self.epsilon}")
 
     def restart(self, position):
         """Condition to restart the mission."""
-        return position == self.env.get_exit_position() or position in self.env.get_fire_map()
+        return self.terminal_grid[position] != 0
 
     def pause(self):
         """Pause the mission.
 
         Use primarily for toggling displaying Q values.
         """
-        self.env.display(self.count,self.max_episode, self.q_table)
+        self.env.display(self.count,self.max_episode, self.get_q_table())
         return self.env.update()
 
     def save_q_table(self): 
@@ -275,21 +418,85 @@ class Agent:
         if self.grid_size == 6:
             level = "hard"
         with open("q_table_" + level + ".pkl", "wb") as q_table_file:
-            pickle.dump(self.q_table, q_table_file)
+            pickle.dump(self.get_q_table(), q_table_file)
 
 
     def checking_convergence(self):
         # Checking if the Q-values obtained from learning process converge.
-        max_error = 0
-        convergence_flag = True
-        for state in self.states:
-            for value in self.q_diff_table[state].values():
-                if abs(value) > max_error:
-                    max_error = abs(value)
-                if not (value >= -0.1 and value <= 0.1):
-                    convergence_flag = False
-        print(f"max q state error: {max_error}")
-        return convergence_flag          
+        if self.verbose:
+            print(f"max q state error: {float(np.abs(self.q_diff_table).max())}")
+        return not bool(np.any(np.abs(self.q_diff_table) > 0.1))          
+
+    def _run_episode(self, episode):
+        """Run one episode and update the Q table from its trajectory.
+
+        Args:
+            episode: Episode number to display on the screen.
+
+        Returns:
+            A tuple (accumulated_reward, episode_success, running).
+            running is false when the close button was hit during the episode.
+        """
+        # Reset the environment before starting a new episode.
+        self.env.reset()
+        self._load_maps()
+        self._build_reward_grid()
+        episode_done = False  
+        episode_success = False
+
+        # initialise variable to keep track of accumulated reward and path used in episode
+        accumulated_reward = 0
+        steps = 0
+        self.traj_s[0] = self.env.current_position
+
+        while not episode_done:
+            if not self.headless:
+                sleep(self.env.get_speed())
+                self.env.display(episode, self.max_episode, self.get_q_table())
+
+            # get current position of robot
+            cx, cy = self.env.current_position
+
+            # get action to be executed based on current position
+            robot_action = self.get_action(cx, cy)
+            if self.verbose:
+                print(f"robot action: {robot_action}")
+
+            # move robot with selected action
+            self.env.move(robot_action)
+
+            # update current position, reward, accumulated reward and optimal path
+            nx, ny = self.env.current_position
+            robot_reward = self.get_reward(nx, ny)
+            accumulated_reward = accumulated_reward + robot_reward
+            if self.verbose:
+                print(f"robot reward: {robot_reward}")
+            self.traj_s[steps + 1] = nx, ny
+
+            # check if episode is over, either at the exit or in fire
+            if self.terminal_grid[nx, ny]:
+                episode_done = True
+                episode_success = (nx, ny) in self.exit_map
+                if self.verbose:
+                    reached = "exit" if episode_success else "fire"
+                    print(f"Episode {self.count} over. Robot reached {reached}. Optimal path: {self.traj_s[:steps + 2].tolist()}")
+
+            # record transition, Q-values are updated at the end of the episode
+            self.traj_a[steps] = self.action_idx[robot_action]
+            self.traj_r[steps] = robot_reward
+            self.traj_done[steps] = episode_done
+            steps += 1
+            if steps == self.max_steps:
+                episode_done = True
+
+            if not self.env.update():
+                return accumulated_reward, episode_success, False
+
+        # update Q-values in a single sweep over the episode trajectory
+        self.update_kernel(self.q_table, self.action_mask, self.traj_s, self.traj_a, self.traj_r,
+                           self.traj_done, steps)
+        self._q_table_dict = None
+        return accumulated_reward, episode_success, True
 
     def learn(self):
         """The agent uses Q-learning to obtain the policy 
@@ -314,87 +521,30 @@ class Agent:
         self.count = 0 
         start = time()
         self.init_plot_config()
+
         for episode in range(self.max_episode):
-            # Reset the environment before starting a new episode.
-            self.env.reset()
-            episode_done = False  
-            episode_success = False
             self.count += 1
+            accumulated_reward, episode_success, running = self._run_episode(episode)
+            if not running:
+                status = self.QUIT
+                break
 
-            # initialise optimal path variable to keep track of path used in episode
-            optimal_path = list()
-            optimal_path.append(tuple(self.env.current_position))
-
-            # initialise variable to keep track of accumulated reward
-            accumulated_reward = 0
-
-            while not episode_done:
-                sleep(self.env.get_speed())
-                self.env.display(episode, self.max_episode, self.q_table)
-
-                # get current position of robot
-                current_robot_position = tuple(self.env.current_position)
-
-                # get action to be executed based on current position
-                robot_action = self.get_action(current_robot_position)
-                print(f"robot action: {robot_action}")
-
-                # move robot with selected action
-                self.env.move(robot_action)
+            # calculate change in q states and update prev_q_table ready for next episode
+            np.subtract(self.q_table, self.prev_q_table, out=self.q_diff_table)
+            np.copyto(self.prev_q_table, self.q_table)
 
-                # update current position, reward, accumulated reward and optimal path
-                next_robot_position = tuple(self.env.current_position)
-                robot_reward = self.get_reward(next_robot_position)
-                accumulated_reward = accumulated_reward + robot_reward
-                print(f"robot reward: {robot_reward}")
-                optimal_path.append(next_robot_position)
-
-                # update cumulative reward and Q-value in selection state
-                if next_robot_position in self.exit_map :
-                    self.q_table[current_robot_position][robot_action] = (
-                    (1-self.alpha) * self.q_table[current_robot_position][robot_action] +
-                    self.alpha * (robot_reward))
-
-                    episode_done = True
-                    episode_success = True
-                    print(f"Episode {self.count} over. Robot reached exit. Optimal path: {optimal_path}")
-                
-                elif next_robot_position in self.fire_map :
-                    self.q_table[current_robot_position][robot_action] = (
-                    (1-self.alpha) * self.q_table[current_robot_position][robot_action] +
-                    self.alpha * (robot_reward))
-
-                    episode_done = True
-                    episode_success = False
-                    print(f"Episode {self.count} over. Robot reached fire. Optimal path: {optimal_path}")
-                
-                else:
-                    self.q_table[current_robot_position][robot_action] = (
-                    (1-self.alpha) * self.q_table[current_robot_position][robot_action] +
-                    self.alpha * (robot_reward + self.gamma * max(list(self.q_table[next_robot_position].values())))
-                )
-
-                if not self.env.update():
-                    status = self.QUIT
-                    break
-
-            # calculate change in q states
-            for state in self.states:
-                for action in self.actions.keys():
-                    self.q_diff_table[state][action] = self.q_table[state][action] - self.prev_q_table[state][action]
             # check for q state convergence
             # note: added episode_success check before checking convergence, i.e. if robot fails and lands on fire, convergence wont be checked
             if self.checking_convergence() and episode_success:
                 print("Q states converged")
                 break
 
-            # update prev_q_table ready for next episode
-            for state in self.states:
-                for action in self.actions.keys():
-                    self.prev_q_table[state][action] = self.q_table[state][action] 
-            
             # update accumulated reward list
-            self.accumulated_reward_for_episode.append(accumulated_reward)
+            self._rewards[self._reward_idx] = accumulated_reward
+            self._reward_idx += 1
+
+            # decay exploration once per episode
+            self.decay_epsilon_greedy()
 
         print("q_diff_table: " , self.q_diff_table)        
         # if not hitting close button, then the status will remain as initialised.
@@ -405,7 +555,7 @@ class Agent:
             # Saving learned Q-table to use for executing the SAR mission 
             self.save_q_table()
 
-            while self.pause():
+            while not self.headless and self.pause():
                 pass
         elif status == self.QUIT:
             print("Quit mission.")
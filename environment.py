@@ -7,6 +7,7 @@ This module is for creating Search and Rescue (SAR) mission environment.
 import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 import pygame as pg
+from image_cache import load_scaled
 
 class Level:
     """Mission level
@@ -19,20 +20,27 @@ class Level:
         grid_size: Number of grid in the grid world.
         fire_map: Map contains all fire positions.
         girl_map and boy_map: Maps contain all victims positions.
+        Maps are frozensets of positions shared by all instances of a level.
     """
     EASY, HARD = 0, 1
+    _EASY_FIRE = frozenset({(0, 2), (0, 3), (1, 0), (3, 2)})
+    _EASY_GIRL = frozenset({(1, 1)})
+    _EASY_BOY = frozenset({(2, 2)})
+    _HARD_FIRE = frozenset({(0, 4), (0, 5), (1, 5), (2, 2), (2, 0),(3, 0), (3, 4), (3, 5), (4, 0), (4, 3), (5, 0)})
+    _HARD_GIRL = frozenset({(5,2), (0, 2)})
+    _HARD_BOY = frozenset({(3, 2), (1, 3)})
     def __init__(self, level):
         """Initialise map corresponding with the specified level."""
         if level == self.EASY:
             self.grid_size = 4
-            self.fire_map = [(0, 2), (0, 3), (1, 0), (3, 2)]
-            self.girl_map = [(1, 1)]
-            self.boy_map = [(2, 2)]
+            self.fire_map = self._EASY_FIRE
+            self.girl_map = self._EASY_GIRL
+            self.boy_map = self._EASY_BOY
         elif level == self.HARD:
             self.grid_size = 6
-            self.fire_map = [(0, 4), (0, 5), (1, 5), (2, 2), (2, 0),(3, 0), (3, 4), (3, 5), (4, 0), (4, 3), (5, 0)]
-            self.girl_map = [(5,2), (0, 2)]
-            self.boy_map = [(3, 2), (1, 3)]
+            self.fire_map = self._HARD_FIRE
+            self.girl_map = self._HARD_GIRL
+            self.boy_map = self._HARD_BOY
 
     def get_grid_size(self):
         """Get number of grids.
@@ -46,9 +54,9 @@ class Level:
         """Get map of the grid corresponding with the specified level.
         
         Returns:
-            Copies of girl_map, boy_map and fire map
+            Mutable sets copied from girl_map, boy_map and fire map
         """
-        return self.girl_map.copy(), self.boy_map.copy(), self.fire_map.copy()
+        return set(self.girl_map), set(self.boy_map), set(self.fire_map)
 
 class Environment:
     """Mission environment.
@@ -78,8 +86,10 @@ class Environment:
             Either be "Mission Failed!" or "Mission Succeed!".
         robot_status:
             Either be "Rescued Victim", "Exploded", or "Exit Found".
+        cur_r, cur_c:
+            The robot's current row and column.
         current_position:
-            The robot's current position. It's a list.
+            The robot's current position. It's a tuple (cur_r, cur_c).
     """
     BLACK = (0, 0, 0)
     WHITE = (255, 255, 255)
@@ -87,6 +97,13 @@ class Environment:
     FONT_MISSION_STATUS, FONT_MISSION_STATUS_SIZE = 'Arial Bold', 20
     MISSION_CAPTION = 'ELEC ENG 4107 Search and Rescue Mission'
     ACTIONS = {"up": 0, "down": 1, "left": 2, "right": 3}
+    _DELTAS = {"up": (-1, 0), "down": (1, 0), "left": (0, -1), "right": (0, 1)}
+    # Pixel offsets of each action's Q value within a grid cell in the debug mode
+    _Q_OFFSETS = {"up": (35, 55), "down": (35, 135), "left": (5, 95), "right": (55, 95)}
+    _Q_TEXT_CACHE_SIZE = 1024
+    _STATUS_TEXT_CACHE_SIZE = 1024
+    # Events after which the window may need presenting again: exposed, restored or refocused
+    _REPAINT_EVENTS = (pg.VIDEOEXPOSE, pg.ACTIVEEVENT)
     FONT_Q_VALUE, FONT_Q_VALUE_SIZE = 'font/cour.ttf', 11
     def __init__(self, level):
         """Init Environment class."""
@@ -95,45 +112,66 @@ class Environment:
         self.window_width = self.grid_size * 100
         self.window_height = self.grid_size * 100 + 100
         self.exit_position = (0, 0)
+        self.init_possible_actions()
         pg.init()
+        # Only quitting, key presses and window repaint events are handled, other events are not queued
+        pg.event.set_blocked(None)
+        pg.event.set_allowed([pg.QUIT, pg.KEYDOWN, *self._REPAINT_EVENTS])
         self.status_font = pg.font.SysFont(self.FONT_MISSION_STATUS, self.FONT_MISSION_STATUS_SIZE)
-        self.q_value_font = pg.font.SysFont(self.FONT_Q_VALUE, self.FONT_Q_VALUE_SIZE)
         self.q_value_font = pg.font.Font(self.FONT_Q_VALUE, self.FONT_Q_VALUE_SIZE)
         self.screen = pg.display.set_mode((self.window_width, self.window_height))
         pg.display.set_caption(self.MISSION_CAPTION)
 
-        self.robot = pg.image.load(r'images/robot.png')
-        self.robot = pg.transform.scale(self.robot, (80, 80))
-        self.fire = pg.image.load(r'images/wall_fire.png')
-        self.fire = pg.transform.scale(self.fire, (80, 85))
-        self.exit = pg.image.load(r'images/exitSign.png')
-        self.exit = pg.transform.scale(self.exit, (80, 80))
-        self.boy1 = pg.image.load(r'images/boy1.png')
-        self.boy1 = pg.transform.scale(self.boy1, (80, 80))
-        self.girl1 = pg.image.load(r'images/girl1.png')
-        self.girl1 = pg.transform.scale(self.girl1, (80, 80))
-
-        self.simple_fire = pg.image.load(r'images/simple_fire.png')
-        self.simple_fire = pg.transform.scale(self.simple_fire, (50, 50))
-        self.simple_people = pg.image.load(r'images/simple_people.png')
-        self.simple_people = pg.transform.scale(self.simple_people, (50, 50))
-        self.simple_exit = pg.image.load(r'images/simple_exit.png')
-        self.simple_exit = pg.transform.scale(self.simple_exit, (50, 50))
-        self.simple_robot = pg.image.load(r'images/simple_robot.png')
-        self.simple_robot = pg.transform.scale(self.simple_robot, (50, 50))
+        # Grid layout does not change, so it is drawn once on the background
+        self.background = pg.Surface((self.window_width, self.window_height)).convert()
+        self.background.fill(self.WHITE)
+        self.display_layout()
+        # Rendered status texts in the format {text: surface}
+        self._render_cache = {}
+        # Rendered Q values in the format {text: surface}
+        self._q_text_cache = {}
+
+        self.robot = load_scaled(r'images/robot.png', (80, 80))
+        self.fire = load_scaled(r'images/wall_fire.png', (80, 85))
+        self.exit = load_scaled(r'images/exitSign.png', (80, 80))
+        self.boy1 = load_scaled(r'images/boy1.png', (80, 80))
+        self.girl1 = load_scaled(r'images/girl1.png', (80, 80))
+
+        self.simple_fire = load_scaled(r'images/simple_fire.png', (50, 50))
+        self.simple_people = load_scaled(r'images/simple_people.png', (50, 50))
+        self.simple_exit = load_scaled(r'images/simple_exit.png', (50, 50))
+        self.simple_robot = load_scaled(r'images/simple_robot.png', (50, 50))
         
         self.speed = 0.5
         self.debug_mode = False
+        self._key_handlers = {pg.K_x: self._faster, pg.K_w: self._slower, pg.K_SPACE: self._toggle_debug}
+        # Episode numbers and Q table shown in the last frame
+        self._displayed_info = None
+        self._displayed_q_table = None
+        # Areas of the screen to update: the whole screen after a reset or a window event,
+        # otherwise what changed since the last update
+        self._full_update = True
+        self._dirty_rects = []
+        self._prev_rects = []
         self.reset()
         print("Environment initialised.")
 
     def reset(self):
         """Reset the environment."""
+        # The screen needs repainting when the mission state changes, and presenting as a whole
+        self._dirty = True
+        self._full_update = True
         self.scores = 0
         self.mission_status = ""
         self.robot_status = ""
         self.girl_map, self.boy_map, self.fire_map = self.level.get_map()
-        self.current_position = [self.grid_size - 1, self.grid_size - 1]
+        self._set_position(self.grid_size - 1, self.grid_size - 1)
+
+        # Fire and exit do not move, so their pixel positions in both modes are computed once
+        self._fire_px_normal = [self._to_px_normal(p) for p in self.fire_map]
+        self._fire_px_debug = [self._to_px_debug(p) for p in self.fire_map]
+        self._exit_px_normal = self._to_px_normal(self.exit_position)
+        self._exit_px_debug = self._to_px_debug(self.exit_position)
     
     def get_speed(self):
         """Get speed between moves.
@@ -147,13 +185,25 @@ class Environment:
         """Get the number of grids."""
         return self.grid_size
 
+    def _set_position(self, r, c):
+        """Set the robot position and cache its tuple and pixel positions in both modes."""
+        self.cur_r, self.cur_c = r, c
+        self._pos_tuple = (r, c)
+        self._pos_px_normal = self._to_px_normal(self._pos_tuple)
+        self._pos_px_debug = self._to_px_debug(self._pos_tuple)
+
+    @property
+    def current_position(self):
+        """Robot current position as a tuple."""
+        return self._pos_tuple
+
     def get_current_position(self):
         """Get robot current position.
         
         Return:
             A tuple of current position.
         """
-        return tuple(self.current_position)
+        return self._pos_tuple
 
     def get_exit_position(self):
         """Get exit position.
@@ -167,7 +217,7 @@ class Environment:
         """Get victim map.
 
         Return:
-            List of tuples of all people positions.
+            Sets of tuples of all people positions.
         """
         return self.girl_map, self.boy_map
 
@@ -175,7 +225,7 @@ class Environment:
         """Get fire map.
 
         Return:
-            List of tuples of all fire positions.
+            Set of tuples of all fire positions.
         """
         return self.fire_map
 
@@ -187,6 +237,25 @@ class Environment:
         """
         return self.ACTIONS
 
+    def init_possible_actions(self):
+        """Initialise the possible actions of every position.
+
+        The grid does not change, so the possible actions are computed once.
+        """
+        self._actions_at = {}
+        for r in range(self.grid_size):
+            for c in range(self.grid_size):
+                possible_actions = []
+                if r != 0:
+                    possible_actions.append("up")
+                if r != self.grid_size - 1:
+                    possible_actions.append("down")
+                if c != 0:
+                    possible_actions.append("left")
+                if c != self.grid_size - 1:
+                    possible_actions.append("right")
+                self._actions_at[(r, c)] = tuple(possible_actions)
+
     def get_possible_actions(self, position):
         """Get all possible actions at a position.
 
@@ -196,21 +265,23 @@ class Environment:
             position: Tuple of position.
         
         Return:
-            List of all possible actions.
+            Tuple of all possible actions.
         """
-        possible_actions = []
-        if position[0] != 0:
-            possible_actions.append("up")
-        if position[0] != self.grid_size - 1:
-            possible_actions.append("down")
-        if position[1] != 0:
-            possible_actions.append("left")
-        if position[1] != self.grid_size - 1:
-            possible_actions.append("right")
-        return possible_actions
-
-    def to_px(self, position):
-        """Convert grid position to pixel.
+        return self._actions_at[tuple(position)]
+
+    @property
+    def debug_mode(self):
+        """Whether all Q values are displayed on the screen."""
+        return self._debug_mode
+
+    @debug_mode.setter
+    def debug_mode(self, debug_mode):
+        self._debug_mode = debug_mode
+        # to_px converts grid positions to pixels for the current mode
+        self.to_px = self._to_px_debug if debug_mode else self._to_px_normal
+
+    def _to_px_normal(self, position):
+        """Convert grid position to pixel in normal mode.
 
         Args:
             position: 
@@ -219,20 +290,44 @@ class Environment:
         Returns:
             A tuple (x, y) coordinates in pixels.
         """
-        position = list(position)
-        if self.debug_mode:
-            px = (position[1] * 100 + 25, position[0] * 100 + 75)
-        else:
-            px = (position[1] * 100 + 10, position[0] * 100 + 60)
-        return px
+        return (position[1] * 100 + 10, position[0] * 100 + 60)
+
+    def _to_px_debug(self, position):
+        """Convert grid position to pixel in debug mode.
+
+        Args:
+            position: 
+                Grid position in tuple/list. Example: (2, 3) or [2, 3].
+
+        Returns:
+            A tuple (x, y) coordinates in pixels.
+        """
+        return (position[1] * 100 + 25, position[0] * 100 + 75)
 
     def display_layout(self):
-        """Display grid layout."""
-        # Create grids
-        for x in range(0, self.window_width, 100):
-            for y in range(50, self.window_height - 50, 100):
-                rect = pg.Rect(x, y, x + 100, 100)
-                pg.draw.rect(self.screen, self.BLACK, rect, 2)
+        """Draw grid layout on the background."""
+        # Create grids, one line per grid border
+        for x in range(0, self.window_width + 1, 100):
+            pg.draw.line(self.background, self.BLACK, (x, 50), (x, self.window_height - 50), 2)
+        for y in range(50, self.window_height - 50 + 1, 100):
+            pg.draw.line(self.background, self.BLACK, (0, y), (self.window_width, y), 2)
+
+    def _text(self, text):
+        """Render a status text, reusing the surface if the same text was rendered before.
+
+        Args:
+            text: Text to render.
+
+        Returns:
+            A surface with the rendered text.
+        """
+        surface = self._render_cache.get(text)
+        if surface is None:
+            if len(self._render_cache) >= self._STATUS_TEXT_CACHE_SIZE:
+                self._render_cache.clear()
+            surface = self.status_font.render(text, True, (0, 0, 0))
+            self._render_cache[text] = surface
+        return surface
 
     def display_debug_mode(self, q_table):
         """Display mission in debug mode.
@@ -241,37 +336,41 @@ class Environment:
             q_table: The Q table to be displayed. 
             Note that the Q table must be a dictionary with the format of {state: {action: value}}. 
             Example: {(0, 0): {"left": 0.123, ..., "down": 0.456}}.
+
+        Returns:
+            List of rects drawn.
         """
-        for fire_position in self.fire_map:
-            self.screen.blit(self.simple_fire, self.to_px(fire_position))
-        self.screen.blit(self.simple_exit, self.to_px(self.exit_position))
-        self.screen.blit(self.simple_robot, self.to_px(self.current_position))
-        for girl_position in self.girl_map:
-            self.screen.blit(self.simple_people, self.to_px(girl_position))
-        for boy_position in self.boy_map:
-            self.screen.blit(self.simple_people, self.to_px(boy_position))
+        blit_sequence = [(self.simple_fire, px) for px in self._fire_px_debug]
+        blit_sequence.append((self.simple_exit, self._exit_px_debug))
+        blit_sequence.append((self.simple_robot, self._pos_px_debug))
+        blit_sequence += [(self.simple_people, self.to_px(girl_position)) for girl_position in self.girl_map]
+        blit_sequence += [(self.simple_people, self.to_px(boy_position)) for boy_position in self.boy_map]
         for position, action_values in q_table.items():
+            x, y = position[1] * 100, position[0] * 100
             for action, value in action_values.items():
-                q_value = self.q_value_font.render('{:.2f}'.format(value), True, (0, 0, 0))
-                if action == "up":
-                    self.screen.blit(q_value, (position[1] * 100 + 35, position[0] * 100 + 55))
-                elif action == "down":
-                    self.screen.blit(q_value, (position[1] * 100 + 35, position[0] * 100 + 135))
-                elif action == "left":
-                    self.screen.blit(q_value, (position[1] * 100 + 5, position[0] * 100 + 95))
-                elif action == "right":
-                    self.screen.blit(q_value, (position[1] * 100 + 55, position[0] * 100 + 95))
+                text = '{:.2f}'.format(value)
+                q_value = self._q_text_cache.get(text)
+                if q_value is None:
+                    if len(self._q_text_cache) >= self._Q_TEXT_CACHE_SIZE:
+                        self._q_text_cache.clear()
+                    q_value = self.q_value_font.render(text, True, (0, 0, 0))
+                    self._q_text_cache[text] = q_value
+                dx, dy = self._Q_OFFSETS[action]
+                blit_sequence.append((q_value, (x + dx, y + dy)))
+        return self.screen.blits(blit_sequence)
 
     def display_mission_mode(self):
-        """Display mission in normal mode."""
-        for fire_position in self.fire_map:
-            self.screen.blit(self.fire, self.to_px(fire_position))
-        self.screen.blit(self.exit, self.to_px(self.exit_position))
-        self.screen.blit(self.robot, self.to_px(self.current_position))
-        for girl_position in self.girl_map:
-            self.screen.blit(self.girl1, self.to_px(girl_position))
-        for boy_position in self.boy_map:
-            self.screen.blit(self.boy1, self.to_px(boy_position))
+        """Display mission in normal mode.
+
+        Returns:
+            List of rects drawn.
+        """
+        blit_sequence = [(self.fire, px) for px in self._fire_px_normal]
+        blit_sequence.append((self.exit, self._exit_px_normal))
+        blit_sequence.append((self.robot, self._pos_px_normal))
+        blit_sequence += [(self.girl1, self.to_px(girl_position)) for girl_position in self.girl_map]
+        blit_sequence += [(self.boy1, self.to_px(boy_position)) for boy_position in self.boy_map]
+        return self.screen.blits(blit_sequence)
 
     def display_info(self, num_episode, max_episode, q_table):
         """Display mission information. 
@@ -285,18 +384,17 @@ class Environment:
                 Maximum number of episode to display on the screen.
             q_table: 
                 Q table to display on the screen in the debug mode.
+
+        Returns:
+            List of rects drawn.
         """
-        episode = self.status_font.render(f'Episode {num_episode}/{max_episode}', True, (0, 0, 0))
-        self.screen.blit(episode, (8, self.window_height - 32))
-        speed = self.status_font.render('Speed {:.2f}s'.format(self.speed), True, (0, 0, 0))
-        self.screen.blit(speed, (self.window_width - 80, self.window_height - 32))
-
-        scores = self.status_font.render(f'Scores: {self.scores}', True, (0, 0, 0))
-        self.screen.blit(scores, (8, 17))
-        mission_status = self.status_font.render(f'{self.mission_status}', True, (0, 0, 0))
-        self.screen.blit(mission_status, (self.window_width - 120, 17))
-        robot_status = self.status_font.render(self.robot_status, True, (0, 0, 0))
-        self.screen.blit(robot_status, (self.window_width/2 - 70, 17))
+        return self.screen.blits([
+            (self._text(f'Episode {num_episode}/{max_episode}'), (8, self.window_height - 32)),
+            (self._text('Speed {:.2f}s'.format(self.speed)), (self.window_width - 80, self.window_height - 32)),
+            (self._text(f'Scores: {self.scores}'), (8, 17)),
+            (self._text(f'{self.mission_status}'), (self.window_width - 120, 17)),
+            (self._text(self.robot_status), (self.window_width/2 - 70, 17)),
+        ])
 
     def display(self, num_episode, max_episode, q_table):
         """Display the mission.
@@ -309,14 +407,26 @@ class Environment:
             q_table: 
                 Q table to display on the screen in the debug mode.
          """
-        self.screen.fill(self.WHITE)
-        self.display_layout()
+        # Skip repainting an unchanged frame
+        if (not self._dirty and self._displayed_info == (num_episode, max_episode)
+                and self._displayed_q_table is q_table):
+            return
+        self._dirty = False
+        self._displayed_info = (num_episode, max_episode)
+        self._displayed_q_table = q_table
+
+        self.screen.blit(self.background, (0, 0))
 
         if self.debug_mode:
-            self.display_debug_mode(q_table)
+            rects = self.display_debug_mode(q_table)
         else:
-            self.display_mission_mode()
-        self.display_info(num_episode, max_episode, q_table)
+            rects = self.display_mission_mode()
+        rects += self.display_info(num_episode, max_episode, q_table)
+
+        # Both where things were drawn in the previous frame and in this one have changed
+        self._dirty_rects += self._prev_rects
+        self._dirty_rects += rects
+        self._prev_rects = rects
 
     def move(self, action):
         """Move the robot with the specified action.
@@ -326,30 +436,41 @@ class Environment:
                 A string of action to move the robot. Be either "left", "right", "up", or "down".
         """
         # Display the robot at the grid position
-        if action in self.get_possible_actions(self.current_position):
-            if action == "up":
-                self.current_position[0] -= 1
-            elif action == "down":
-                self.current_position[0] += 1
-            elif action == "left":
-                self.current_position[1] -= 1
-            elif action == "right":
-                self.current_position[1] += 1
+        dr, dc = self._DELTAS[action]
+        nr, nc = self.cur_r + dr, self.cur_c + dc
+        if 0 <= nr < self.grid_size and 0 <= nc < self.grid_size:
+            self._set_position(nr, nc)
+            self._dirty = True
+
+    def _faster(self):
+        """Reduce delay between moves."""
+        if self.speed >= 0.05:
+            self.speed -= 0.05
+
+    def _slower(self):
+        """Increase delay between moves."""
+        self.speed += 0.05
+
+    def _toggle_debug(self):
+        """Toggle displaying Q values."""
+        self.debug_mode ^= True
 
     def update(self):
         """Update the mission screen."""
-        if tuple(self.current_position) in self.girl_map:
-            self.girl_map.remove(tuple(self.current_position))
+        status = (self.scores, self.robot_status, self.mission_status)
+        position = self._pos_tuple
+        if position in self.girl_map:
+            self.girl_map.discard(position)
             self.robot_status = "Rescued Victim"
             self.scores += 1
-        elif tuple(self.current_position) in self.boy_map:
-            self.boy_map.remove(tuple(self.current_position))
+        elif position in self.boy_map:
+            self.boy_map.discard(position)
             self.robot_status = "Rescued Victim"
             self.scores += 1
-        elif tuple(self.current_position) in self.fire_map:
+        elif position in self.fire_map:
             self.robot_status = "Robot Exploded"
             self.mission_status = "Mission Failed!"
-        elif tuple(self.current_position) == self.exit_position:
+        elif position == self.exit_position:
             self.robot_status = "Exit Found"
             if self.grid_size == 4 and self.scores == 2 :
                 self.mission_status = "Mission Succeed!"
@@ -357,24 +478,25 @@ class Environment:
                 self.mission_status = "Mission Succeed!"  
             else:   
                 self.mission_status = "Mission Failed!"
+        if status != (self.scores, self.robot_status, self.mission_status):
+            self._dirty = True
 
-        for event in pg.event.get():
+        for event in pg.event.get((pg.QUIT, pg.KEYDOWN) + self._REPAINT_EVENTS):
             if event.type == pg.QUIT:
                 pg.quit()
                 return False
-            if event.type == pg.KEYDOWN:
-                # Reduce delay between moves
-                if event.key == pg.K_x:
-                    if self.speed >= 0.05:
-                        self.speed -= 0.05
-
-                # Increase delay between moves
-                if event.key == pg.K_w:
-                    self.speed += 0.05
-
-                # Toggle displaying Q values
-                if event.key == pg.K_SPACE:
-                    self.debug_mode ^= True
-
-        pg.display.update()
+            if event.type in self._REPAINT_EVENTS:
+                self._full_update = True
+            elif event.type == pg.KEYDOWN:
+                handler = self._key_handlers.get(event.key)
+                if handler:
+                    handler()
+                    self._dirty = True
+
+        if self._full_update:
+            pg.display.update()
+            self._full_update = False
+        else:
+            pg.display.update(self._dirty_rects)
+        self._dirty_rects = []
         return True
\ No newline at end of file
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""Image cache
+
+This module loads the mission images once and shares them between all environments.
+"""
+
+import functools
+import pygame as pg
+
+@functools.lru_cache(maxsize=None)
+def load_scaled(path, size):
+    """Load an image scaled to the specified size and converted to the display format.
+
+    Images are scaled once here and never again in the render loop.
+    The display must be initialised before the first call.
+
+    Args:
+        path: Path of the image file.
+        size: Tuple (width, height) in pixels.
+
+    Returns:
+        The loaded surface. It is shared, so it must not be modified.
+    """
+    # Scaled first so that the stored result is the one converted to the display format
+    return pg.transform.scale(pg.image.load(path), size).convert_alpha()
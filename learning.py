@@ -7,8 +7,8 @@ Robot's mission: Rescue all victims in danger without entering any fire spots an
 from agent import Agent
 import argparse
 
-def learning(level, max_episode):
-    agent = Agent(level, max_episode)
+def learning(level, max_episode, verbose=False, headless=False):
+    agent = Agent(level, max_episode, verbose, headless)
     agent.learn()
     agent.plot()
 
@@ -16,5 +16,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='ELEC ENG 4107 Search and Rescue Mission.')
     parser.add_argument('-lv', "--level", choices=['easy', 'hard'], help='Mission level (easy or hard).', required=True)
     parser.add_argument('-ep', "--episode", help='Number of epsiodes', required=True)
+    parser.add_argument('-v', "--verbose", action='store_true', help='Print learning details of every step.')
+    parser.add_argument("--headless", action='store_true', help='Learn without displaying every move.')
     args = parser.parse_args()
-    learning(args.level, args.episode)
+    learning(args.level, args.episode, args.verbose, args.headless)
@@ -5,6 +5,7 @@ Robot's mission: Rescue all victims in danger without entering any fire spots an
 """
 
 import pickle
+import numpy as np
 from time import time, sleep
 from environment import Level, Environment
 from agent import Agent
@@ -25,6 +26,18 @@ def run_mission(level):
 	with open("q_table_" + level + ".pkl", "rb") as q_table_file:
 		q_table = pickle.load(q_table_file)
 
+	# Q table is read-only during the mission, so the greedy action of each state is computed once
+	# by a single argmax over the Q table as an array. Impossible actions and actions missing from the Q table are never chosen.
+	actions = list(env.get_actions())
+	grid_size = env.get_grid_size()
+	q_values = np.full((grid_size, grid_size, len(actions)), -np.inf)
+	for (r, c), action_values in q_table.items():
+		possible_actions = env.get_possible_actions((r, c))
+		for i, action in enumerate(actions):
+			if action in action_values and action in possible_actions:
+				q_values[r, c, i] = action_values[action]
+	best_action = {position: actions[i] for position, i in np.ndenumerate(q_values.argmax(axis=2))}
+
 	print("Starting Mission...")
 	status = PLAYING
 	start = time()
@@ -36,19 +49,19 @@ def run_mission(level):
 	fire_map = env.get_fire_map()      
 
 	# update initial position of robot
-	position = tuple(env.current_position) 
+	position = env.current_position
 	while not episode_done:
 		sleep(env.get_speed())
 		env.display(episode, episode, q_table)
 
 		# get action to be executed based on q-values
-		robot_action = max(q_table[position], key=q_table[position].get)
+		robot_action = best_action[position]
 
 		# move robot with selected action
 		env.move(robot_action)
 
 		# update current position
-		position = tuple(env.current_position)
+		position = env.current_position
 		
 		# check if mission is over
 		if position in exit_map :